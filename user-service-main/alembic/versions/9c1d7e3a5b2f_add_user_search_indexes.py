@@ -0,0 +1,66 @@
+"""Add user search indexes
+
+Revision ID: 9c1d7e3a5b2f
+Revises: 4e2f40d95523
+Create Date: 2026-10-19 10:12:44.281904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1d7e3a5b2f'
+down_revision: Union[str, Sequence[str], None] = '4e2f40d95523'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE users_fts USING fts5(name, email, content='users', tokenize='trigram')",
+    "CREATE TRIGGER users_fts_ai AFTER INSERT ON users BEGIN "
+    "INSERT INTO users_fts(rowid, name, email) VALUES (new.rowid, new.name, new.email); END",
+    "CREATE TRIGGER users_fts_ad AFTER DELETE ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, name, email) VALUES ('delete', old.rowid, old.name, old.email); END",
+    "CREATE TRIGGER users_fts_au AFTER UPDATE OF name, email ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, name, email) VALUES ('delete', old.rowid, old.name, old.email); "
+    "INSERT INTO users_fts(rowid, name, email) VALUES (new.rowid, new.name, new.email); END",
+    "INSERT INTO users_fts(users_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        # GiST rather than GIN: the same index serves ILIKE '%q%' and the
+        # KNN (<<->) ordering search uses to bound its candidate set. The
+        # default 12-byte signature matches most of a large table for short
+        # queries; 256 bytes keeps misses like name ILIKE '%com%' cheap.
+        # Built without locking writes on large tables.
+        with op.get_context().autocommit_block():
+            op.create_index('ix_users_name_trgm', 'users', ['name'], postgresql_using='gist',
+                            postgresql_ops={'name': 'gist_trgm_ops(siglen=256)'}, postgresql_concurrently=True)
+            op.create_index('ix_users_email_trgm', 'users', ['email'], postgresql_using='gist',
+                            postgresql_ops={'email': 'gist_trgm_ops(siglen=256)'}, postgresql_concurrently=True)
+    elif dialect == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            op.execute(sa.text(statement))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_users_email_trgm', table_name='users', postgresql_concurrently=True)
+            op.drop_index('ix_users_name_trgm', table_name='users', postgresql_concurrently=True)
+    elif dialect == 'sqlite':
+        for trigger in ('users_fts_au', 'users_fts_ad', 'users_fts_ai'):
+            op.execute(sa.text(f'DROP TRIGGER IF EXISTS {trigger}'))
+        op.execute(sa.text('DROP TABLE IF EXISTS users_fts'))
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from jose import JWTError
 from app.db.database import get_db
 from app.db.cache import get_redis
@@ -38,7 +38,12 @@ async def get_current_user(
     if email is None or token_type != "access":
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == email).first()
+    user = (
+        db.query(User)
+        .options(joinedload(User.preferences))
+        .filter(User.email == email)
+        .first()
+    )
     if user is None:
         raise credentials_exception
     
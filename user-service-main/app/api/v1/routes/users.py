@@ -1,62 +1,184 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert, literal, select, update
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+from typing import FrozenSet, List, Optional
+from datetime import datetime
+import asyncio
 import uuid
 import json
 from app.db.database import get_db
 from app.db.cache import get_redis
+from app.db.projection import parse_fields, project_dict, project_row, projected_select
+from app.db.search import MIN_QUERY_LENGTH, decode_cursor, search_users
+from app.db.write_buffer import PushTokenWriteBuffer, get_push_token_buffer
 from app.db.models import User, UserPreference
 from app.schemas.user import UserCreate, User as UserSchema, UserUpdatePushToken, UserUpdatePreferences
-from app.schemas.response import GenericResponse
+from app.schemas.response import CursorPaginationMeta, GenericResponse
 from app.services.security import get_password_hash
 from app.api.v1.routes.auth import get_current_user
 from app.services.metrics import (
     user_registrations_total,
     cache_operations_total,
     cache_hit_rate,
-    active_users_gauge
+    push_token_writes_total
 )
 
 router = APIRouter()
 
-@router.post("/", response_model=GenericResponse[UserSchema], status_code=status.HTTP_201_CREATED)
-async def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
+def get_fields(
+    fields: Optional[str] = Query(None, description="Comma-separated subset of id,name,email,push_token,preferences")
+) -> Optional[FrozenSet[str]]:
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail=str(e)
         )
-    
-    db_user = User(
-        name=user_data.name,
-        email=user_data.email,
-        hashed_password=get_password_hash(user_data.password)
+
+def _projected_response(data, message: str) -> JSONResponse:
+    # Partial users don't fit UserSchema, so skip response_model validation.
+    return JSONResponse({
+        "success": True,
+        "data": data,
+        "error": None,
+        "message": message,
+        "meta": None
+    })
+
+def _registration_statement(user_values: dict, preference_values: dict):
+    # One round trip: the preference row is only inserted if the user row was.
+    new_user = (
+        pg_insert(User)
+        .values(**user_values)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.id, User.name, User.email, User.push_token)
+        .cte("new_user")
     )
-    db.add(db_user)
-    db.flush()
+    new_preference = (
+        pg_insert(UserPreference)
+        .from_select(
+            ["id", "user_id", "email", "push"],
+            select(
+                literal(preference_values["id"], UUID(as_uuid=True)),
+                new_user.c.id,
+                literal(preference_values["email"]),
+                literal(preference_values["push"])
+            )
+        )
+        .returning(UserPreference.user_id, UserPreference.email, UserPreference.push)
+        .cte("new_preference")
+    )
+    return select(
+        new_user.c.id,
+        new_user.c.name,
+        new_user.c.email,
+        new_user.c.push_token,
+        new_preference.c.email.label("preference_email"),
+        new_preference.c.push.label("preference_push")
+    ).join_from(new_user, new_preference, new_preference.c.user_id == new_user.c.id)
+
+def _insert_user(db: Session, user_data: UserCreate, hashed_password: str) -> Optional[UserSchema]:
+    user_id = uuid.uuid4()
+    user_values = {
+        "id": user_id,
+        "name": user_data.name,
+        "email": user_data.email,
+        "hashed_password": hashed_password,
+        "created_at": datetime.utcnow()
+    }
+    preference_values = {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "email": user_data.preferences.email,
+        "push": user_data.preferences.push
+    }
+    
+    if db.get_bind().dialect.name != "postgresql":
+        try:
+            db.execute(insert(User).values(**user_values))
+            db.execute(insert(UserPreference).values(**preference_values))
+        except IntegrityError:
+            db.rollback()
+            return None
+        return UserSchema.model_validate({**user_values, "preferences": preference_values})
     
-    db_preference = UserPreference(
-        user_id=db_user.id,
-        email=user_data.preferences.email,
-        push=user_data.preferences.push
+    row = db.execute(_registration_statement(user_values, preference_values)).one_or_none()
+    if row is None:
+        return None
+    
+    return UserSchema(
+        id=row.id,
+        name=row.name,
+        email=row.email,
+        push_token=row.push_token,
+        preferences={
+            "user_id": row.id,
+            "email": row.preference_email,
+            "push": row.preference_push
+        }
     )
-    db.add(db_preference)
+
+@router.post("/", response_model=GenericResponse[UserSchema], status_code=status.HTTP_201_CREATED)
+async def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
+    user_schema = _insert_user(db, user_data, get_password_hash(user_data.password))
+    if user_schema is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     db.commit()
-    db.refresh(db_user)
     
     user_registrations_total.inc()
-    active_users_gauge.set(db.query(User).count())
     
     return GenericResponse(
         success=True,
-        data=UserSchema.model_validate(db_user),
+        data=user_schema,
         message="User created successfully"
     )
 
+@router.get("/search", response_model=GenericResponse[List[UserSchema]])
+async def search(
+    q: str = Query(
+        ...,
+        min_length=MIN_QUERY_LENGTH,
+        description=(
+            "Substring of name or email. On Postgres at most SEARCH_MAX_CANDIDATES "
+            "best matches per column are ranked; meta.truncated is true on the last "
+            "page when more matches exist than were returned."
+        )
+    ),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    users, next_cursor, truncated = search_users(db, q, limit, after)
+    
+    return GenericResponse(
+        success=True,
+        data=[UserSchema.model_validate(user) for user in users],
+        message="Users retrieved successfully",
+        meta=CursorPaginationMeta(limit=limit, next_cursor=next_cursor, truncated=truncated)
+    )
+
 @router.get("/{user_id}", response_model=GenericResponse[UserSchema])
 async def get_user(
     user_id: uuid.UUID,
+    fields: Optional[FrozenSet[str]] = Depends(get_fields),
     db: Session = Depends(get_db),
     cache = Depends(get_redis),
     current_user: User = Depends(get_current_user)
@@ -68,6 +190,8 @@ async def get_user(
         cache_hit_rate.labels(result='hit').inc()
         cache_operations_total.labels(operation='get', status='hit').inc()
         user_data = json.loads(cached_user)
+        if fields is not None:
+            return _projected_response(project_dict(user_data, fields), "User retrieved from cache")
         return GenericResponse(
             success=True,
             data=user_data,
@@ -77,7 +201,7 @@ async def get_user(
     cache_hit_rate.labels(result='miss').inc()
     cache_operations_total.labels(operation='get', status='miss').inc()
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.query(User).options(joinedload(User.preferences)).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -88,6 +212,14 @@ async def get_user(
     cache.setex(cache_key, 3600, user_schema.model_dump_json())
     cache_operations_total.labels(operation='set', status='success').inc()
     
+    # Projected misses still load and cache the full user, so later projected
+    # reads of the same id are served from Redis.
+    if fields is not None:
+        return _projected_response(
+            project_dict(user_schema.model_dump(mode="json"), fields),
+            "User retrieved successfully"
+        )
+    
     return GenericResponse(
         success=True,
         data=user_schema,
@@ -98,10 +230,18 @@ async def get_user(
 async def list_users(
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[FrozenSet[str]] = Depends(get_fields),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    users = db.query(User).offset(skip).limit(limit).all()
+    if fields is not None:
+        rows = db.execute(projected_select(fields).offset(skip).limit(limit)).all()
+        return _projected_response(
+            [project_row(row, fields) for row in rows],
+            "Users retrieved successfully"
+        )
+    
+    users = db.query(User).options(joinedload(User.preferences)).offset(skip).limit(limit).all()
     
     return GenericResponse(
         success=True,
@@ -115,7 +255,8 @@ async def update_push_token(
     token_data: UserUpdatePushToken,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-    cache = Depends(get_redis)
+    cache = Depends(get_redis),
+    write_buffer: Optional[PushTokenWriteBuffer] = Depends(get_push_token_buffer)
 ):
     if current_user.id != user_id:
         raise HTTPException(
@@ -123,23 +264,62 @@ async def update_push_token(
             detail="Not authorized to update this user"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    # With write-behind, current_user can predate a batch that committed since
+    # it was loaded, so only a matching buffered token proves a no-op.
+    if write_buffer is not None:
+        unchanged = write_buffer.pending_token(user_id) == token_data.push_token
+    else:
+        unchanged = current_user.push_token == token_data.push_token
+    
+    if unchanged:
+        push_token_writes_total.labels(result='unchanged').inc()
+        return GenericResponse(
+            success=True,
+            data=UserSchema.model_validate(current_user).model_copy(
+                update={"push_token": token_data.push_token}
+            ),
+            message="Push token unchanged"
+        )
+    
+    if write_buffer is not None:
+        flushed = write_buffer.submit(user_id, token_data.push_token)
+        push_token_writes_total.labels(result='buffered').inc()
+        if write_buffer.wait_for_flush:
+            await asyncio.wrap_future(flushed)
+        
+        return GenericResponse(
+            success=True,
+            data=UserSchema.model_validate(current_user).model_copy(
+                update={"push_token": token_data.push_token}
+            ),
+            message="Push token updated successfully"
+        )
+    
+    row = db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(push_token=token_data.push_token)
+        .returning(User.id, User.name, User.email, User.push_token)
+        .execution_options(synchronize_session=False)
+    ).one_or_none()
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    user.push_token = token_data.push_token
+    user_schema = UserSchema.model_validate(
+        {**row._mapping, "preferences": current_user.preferences}
+    )
     db.commit()
-    db.refresh(user)
+    push_token_writes_total.labels(result='written').inc()
     
     cache.delete(f"user:{user_id}")
     cache_operations_total.labels(operation='delete', status='success').inc()
     
     return GenericResponse(
         success=True,
-        data=UserSchema.model_validate(user),
+        data=user_schema,
         message="Push token updated successfully"
     )
 
@@ -157,23 +337,36 @@ async def update_preferences(
             detail="Not authorized to update this user"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    row = db.execute(
+        update(UserPreference)
+        .where(UserPreference.user_id == user_id)
+        .values(
+            email=preferences_data.preferences.email,
+            push=preferences_data.preferences.push
+        )
+        .returning(UserPreference.user_id, UserPreference.email, UserPreference.push)
+        .execution_options(synchronize_session=False)
+    ).one_or_none()
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    user.preferences.email = preferences_data.preferences.email
-    user.preferences.push = preferences_data.preferences.push
+    user_schema = UserSchema.model_validate({
+        "id": current_user.id,
+        "name": current_user.name,
+        "email": current_user.email,
+        "push_token": current_user.push_token,
+        "preferences": dict(row._mapping)
+    })
     db.commit()
-    db.refresh(user)
     
     cache.delete(f"user:{user_id}")
     cache_operations_total.labels(operation='delete', status='success').inc()
     
     return GenericResponse(
         success=True,
-        data=UserSchema.model_validate(user),
+        data=user_schema,
         message="Preferences updated successfully"
     )
\ No newline at end of file
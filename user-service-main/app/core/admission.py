@@ -0,0 +1,168 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from app.core.settings import settings
+from app.services.metrics import (
+    admission_concurrency_limit,
+    admission_in_flight,
+    admission_queue_seconds,
+    admission_rejections_total
+)
+
+EXEMPT_PATHS = ("/health", "/metrics")
+
+class AdaptiveLimiter:
+    # AIMD: the limit grows by 1/limit after each request that finishes under
+    # the latency target and shrinks by 10% when one does not, at most once per
+    # backoff window so a burst of slow completions only counts once.
+    def __init__(
+        self,
+        route_class: str,
+        limit: int,
+        min_limit: int,
+        max_limit: int,
+        max_queue_time: float,
+        target_latency: float,
+        backoff_window: float
+    ):
+        self.route_class = route_class
+        self.limit = float(limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue_time = max_queue_time
+        self.target_latency = target_latency
+        self.backoff_window = backoff_window
+        self.in_flight = 0
+        self._last_backoff: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+        admission_concurrency_limit.labels(route_class=route_class).set(limit)
+
+    async def acquire(self) -> bool:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self._admit()
+            return True
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            await asyncio.wait({waiter}, timeout=self.max_queue_time)
+        except asyncio.CancelledError:
+            # The caller went away while queued. If release() already handed
+            # us a slot, give it back or it is never released.
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                admission_in_flight.labels(route_class=self.route_class).set(self.in_flight)
+                self._wake_waiters()
+            else:
+                waiter.cancel()
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+        admission_queue_seconds.labels(route_class=self.route_class).observe(time.monotonic() - started)
+
+        if waiter.done() and not waiter.cancelled():
+            return True
+
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        admission_rejections_total.labels(route_class=self.route_class).inc()
+        return False
+
+    def release(self, latency: float) -> None:
+        self.in_flight -= 1
+        admission_in_flight.labels(route_class=self.route_class).set(self.in_flight)
+
+        now = time.monotonic()
+        if latency <= self.target_latency:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        elif self._last_backoff is None or now - self._last_backoff >= self.backoff_window:
+            self.limit = max(self.min_limit, self.limit * 0.9)
+            self._last_backoff = now
+        admission_concurrency_limit.labels(route_class=self.route_class).set(int(self.limit))
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._admit()
+                waiter.set_result(True)
+
+    def _admit(self) -> None:
+        self.in_flight += 1
+        admission_in_flight.labels(route_class=self.route_class).set(self.in_flight)
+
+def _limiter(route_class: str, limit: int, target_latency_ms: int) -> AdaptiveLimiter:
+    return AdaptiveLimiter(
+        route_class,
+        limit=limit,
+        min_limit=settings.ADMISSION_MIN_LIMIT,
+        max_limit=limit * 4,
+        max_queue_time=settings.ADMISSION_MAX_QUEUE_MS / 1000,
+        target_latency=target_latency_ms / 1000,
+        backoff_window=settings.ADMISSION_BACKOFF_WINDOW_MS / 1000
+    )
+
+# Targets are per class: a single bcrypt hash takes ~300 ms, so auth routes
+# need a target well above the cost of one uncontended request.
+limiters: Dict[str, AdaptiveLimiter] = {
+    "auth": _limiter("auth", settings.ADMISSION_AUTH_LIMIT, settings.ADMISSION_AUTH_TARGET_LATENCY_MS),
+    "read": _limiter("read", settings.ADMISSION_READ_LIMIT, settings.ADMISSION_READ_TARGET_LATENCY_MS),
+    "write": _limiter("write", settings.ADMISSION_WRITE_LIMIT, settings.ADMISSION_WRITE_TARGET_LATENCY_MS),
+}
+
+def classify(method: str, path: str) -> Optional[str]:
+    if path.startswith(EXEMPT_PATHS):
+        return None
+    # Login, refresh and registration are dominated by bcrypt / JWT work.
+    if path.startswith("/api/v1/auth") or (method == "POST" and path.rstrip("/") == "/api/v1/users"):
+        return "auth"
+    if method in ("GET", "HEAD", "OPTIONS"):
+        return "read"
+    return "write"
+
+class AdmissionControlMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = limiters[route_class]
+        if not await limiter.acquire():
+            await _send_overloaded(send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.monotonic() - started)
+
+async def _send_overloaded(send) -> None:
+    body = json.dumps({"detail": "Service overloaded, retry later"}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+            (b"retry-after", str(settings.ADMISSION_RETRY_AFTER_SECONDS).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,152 @@
+import hashlib
+import json
+from app.core.settings import settings
+from app.db.cache import get_redis
+from app.services.metrics import idempotency_requests_total
+
+IDEMPOTENT_METHODS = ("POST", "PUT")
+IDEMPOTENT_PREFIX = "/api/v1/users"
+MAX_KEY_LENGTH = 255
+
+def _header(scope, name: bytes) -> str:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return ""
+
+async def _send_json(send, status_code: int, payload: dict, extra_headers=()) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+            *extra_headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class IdempotencyMiddleware:
+    # Completed responses (anything below 500) are stored under the key for
+    # IDEMPOTENCY_TTL_SECONDS and replayed verbatim. While the first request
+    # runs, an in-progress marker makes concurrent retries get a 409.
+    def __init__(self, app, cache_factory=get_redis):
+        self.app = app
+        self.cache_factory = cache_factory
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in IDEMPOTENT_METHODS
+            or not scope["path"].startswith(IDEMPOTENT_PREFIX)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        idempotency_key = _header(scope, b"idempotency-key")
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, {"detail": "Idempotency-Key is too long"})
+            return
+
+        messages = []
+        body = b""
+        while True:
+            message = await receive()
+            messages.append(message)
+            body += message.get("body", b"")
+            if message["type"] != "http.request" or not message.get("more_body", False):
+                break
+
+        async def replay_receive():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        # Scope keys to the caller so one principal can't read another's replay.
+        principal = hashlib.sha256(_header(scope, b"authorization").encode("utf-8")).hexdigest()
+        cache_key = "idempotency:" + hashlib.sha256(
+            f"{principal}:{scope['method']}:{scope['path']}:{idempotency_key}".encode("utf-8")
+        ).hexdigest()
+        fingerprint = hashlib.sha256(body).hexdigest()
+
+        cache = self.cache_factory()
+        claimed = cache.set(
+            cache_key,
+            json.dumps({"status": "in_progress", "fingerprint": fingerprint}),
+            nx=True,
+            ex=settings.IDEMPOTENCY_LOCK_TTL_SECONDS
+        )
+        if not claimed:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                await self._respond_from_record(send, json.loads(cached), fingerprint)
+                return
+            # Cache unavailable: serve the request without idempotency.
+            idempotency_requests_total.labels(result='bypassed').inc()
+            await self.app(scope, replay_receive, send)
+            return
+
+        idempotency_requests_total.labels(result='claimed').inc()
+        response = {"status_code": 500, "headers": [], "body": b""}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status_code"] = message["status"]
+                response["headers"] = [
+                    (key.decode("latin-1"), value.decode("latin-1"))
+                    for key, value in message.get("headers", [])
+                    if key == b"content-type"
+                ]
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+            await send(message)
+
+        completed = False
+        try:
+            await self.app(scope, replay_receive, capture_send)
+            if response["status_code"] < 500:
+                # If the record can't be stored, drop the marker rather than
+                # leave retries stuck on 409 until the lock expires.
+                completed = bool(cache.setex(cache_key, settings.IDEMPOTENCY_TTL_SECONDS, json.dumps({
+                    "status": "completed",
+                    "fingerprint": fingerprint,
+                    "status_code": response["status_code"],
+                    "headers": response["headers"],
+                    "body": response["body"].decode("utf-8"),
+                })))
+        finally:
+            if not completed:
+                cache.delete(cache_key)
+
+    async def _respond_from_record(self, send, record: dict, fingerprint: str) -> None:
+        if record["fingerprint"] != fingerprint:
+            idempotency_requests_total.labels(result='mismatch').inc()
+            await _send_json(send, 422, {"detail": "Idempotency-Key was reused with a different request"})
+            return
+
+        if record["status"] == "in_progress":
+            idempotency_requests_total.labels(result='in_progress').inc()
+            await _send_json(
+                send,
+                409,
+                {"detail": "A request with this Idempotency-Key is still in progress"},
+                [(b"retry-after", b"1")]
+            )
+            return
+
+        idempotency_requests_total.labels(result='replayed').inc()
+        body = record["body"].encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": record["status_code"],
+            "headers": [
+                *((key.encode("latin-1"), value.encode("latin-1")) for key, value in record["headers"]),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"idempotent-replayed", b"true"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
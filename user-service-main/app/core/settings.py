@@ -9,5 +9,27 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    CACHE_SOCKET_TIMEOUT_MS: int = 50
+    CACHE_FAILURE_THRESHOLD: int = 5
+    CACHE_RESET_TIMEOUT_SECONDS: float = 5.0
+    PUSH_TOKEN_WRITE_BEHIND: bool = False
+    PUSH_TOKEN_FLUSH_INTERVAL_MS: int = 20
+    PUSH_TOKEN_FLUSH_MAX_ROWS: int = 500
+    PUSH_TOKEN_WAIT_FOR_FLUSH: bool = True
+    SEARCH_MAX_CANDIDATES: int = 1000
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_TTL_SECONDS: int = 30
+    INTERNAL_API_TOKEN: str = ""
+    INTERNAL_LOOKUP_BATCH_SIZE: int = 100
+    ADMISSION_AUTH_LIMIT: int = 8
+    ADMISSION_READ_LIMIT: int = 64
+    ADMISSION_WRITE_LIMIT: int = 32
+    ADMISSION_MIN_LIMIT: int = 2
+    ADMISSION_MAX_QUEUE_MS: int = 200
+    ADMISSION_AUTH_TARGET_LATENCY_MS: int = 1000
+    ADMISSION_READ_TARGET_LATENCY_MS: int = 250
+    ADMISSION_WRITE_TARGET_LATENCY_MS: int = 250
+    ADMISSION_BACKOFF_WINDOW_MS: int = 1000
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
 
 settings = Settings()
\ No newline at end of file
@@ -1,7 +1,157 @@
+import threading
+import time
 import redis
 from app.core.settings import settings
+from app.services.metrics import cache_circuit_state, cache_operations_total
 
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+class CircuitBreaker:
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        cache_circuit_state.set(0)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Let exactly one probe through; everyone else keeps failing fast.
+                self._set_state(self.HALF_OPEN)
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        cache_circuit_state.set(self._STATE_VALUES[state])
+
+class CircuitBreakerCache:
+    # Redis is an optimization: while the breaker is open reads miss, writes are
+    # skipped, and failed or skipped invalidations are replayed before the next
+    # call that reaches Redis, so it never serves a value we meant to delete.
+    def __init__(self, client, breaker: CircuitBreaker, max_pending_deletes: int = 10000):
+        self.client = client
+        self.breaker = breaker
+        self._max_pending_deletes = max_pending_deletes
+        self._pending_deletes = set()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._call("get", None, key)
+
+    def mget(self, keys):
+        return self._call("mget", [None] * len(keys), keys)
+
+    def set(self, key, value, **kwargs):
+        return self._call("set", None, key, value, **kwargs)
+
+    def setex(self, key, ttl, value):
+        return self._call("setex", None, key, ttl, value)
+
+    def delete(self, *keys):
+        result = self._call("delete", None, *keys)
+        if result is None:
+            with self._lock:
+                if len(self._pending_deletes) + len(keys) <= self._max_pending_deletes:
+                    self._pending_deletes.update(keys)
+                    return result
+            cache_operations_total.labels(operation='delete', status='dropped').inc()
+        return result
+
+    def pipeline(self, transaction: bool = True):
+        return CircuitBreakerPipeline(self, self.client.pipeline(transaction=transaction))
+
+    def ping(self):
+        return self.client.ping()
+
+    def _call(self, operation: str, fallback, *args, **kwargs):
+        return self._guarded(operation, fallback, getattr(self.client, operation), *args, **kwargs)
+
+    def _guarded(self, operation: str, fallback, command, *args, **kwargs):
+        if not self.breaker.allow():
+            cache_operations_total.labels(operation=operation, status='skipped').inc()
+            return fallback
+
+        try:
+            if self._pending_deletes:
+                self._replay_deletes()
+            result = command(*args, **kwargs)
+        except (redis.RedisError, OSError):
+            self.breaker.record_failure()
+            cache_operations_total.labels(operation=operation, status='error').inc()
+            return fallback
+
+        self.breaker.record_success()
+        return result
+
+    def _replay_deletes(self) -> None:
+        with self._lock:
+            keys, self._pending_deletes = self._pending_deletes, set()
+        if not keys:
+            return
+        try:
+            self.client.delete(*keys)
+        except (redis.RedisError, OSError):
+            with self._lock:
+                self._pending_deletes.update(keys)
+            raise
+
+class CircuitBreakerPipeline:
+    # Commands are buffered locally; only execute() touches Redis, so that is
+    # the one call that goes through the breaker.
+    def __init__(self, cache: CircuitBreakerCache, pipeline):
+        self.cache = cache
+        self.pipeline = pipeline
+
+    def setex(self, key, ttl, value):
+        self.pipeline.setex(key, ttl, value)
+        return self
+
+    def execute(self):
+        commands = len(self.pipeline)
+        try:
+            return self.cache._guarded("pipeline", [None] * commands, self.pipeline.execute)
+        finally:
+            self.pipeline.reset()
+
+redis_client = redis.from_url(
+    settings.REDIS_URL,
+    decode_responses=True,
+    socket_timeout=settings.CACHE_SOCKET_TIMEOUT_MS / 1000,
+    socket_connect_timeout=settings.CACHE_SOCKET_TIMEOUT_MS / 1000
+)
+cache = CircuitBreakerCache(
+    redis_client,
+    CircuitBreaker(settings.CACHE_FAILURE_THRESHOLD, settings.CACHE_RESET_TIMEOUT_SECONDS)
+)
 
 def get_redis():
-    return redis_client
\ No newline at end of file
+    return cache
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, String
+from sqlalchemy import DDL, Boolean, Column, DateTime, ForeignKey, Index, String, event
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime
@@ -8,6 +8,10 @@ Base = declarative_base()
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_name_trgm", "name", postgresql_using="gist", postgresql_ops={"name": "gist_trgm_ops(siglen=256)"}),
+        Index("ix_users_email_trgm", "email", postgresql_using="gist", postgresql_ops={"email": "gist_trgm_ops(siglen=256)"}),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
@@ -26,4 +30,20 @@ class UserPreference(Base):
     email = Column(Boolean, default=True, nullable=False)
     push = Column(Boolean, default=True, nullable=False)
     
-    user = relationship("User", back_populates="preferences")
\ No newline at end of file
+    user = relationship("User", back_populates="preferences")
+
+# SQLite has no pg_trgm; search runs against an FTS5 trigram index kept in sync by triggers.
+USERS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE users_fts USING fts5(name, email, content='users', tokenize='trigram')",
+    "CREATE TRIGGER users_fts_ai AFTER INSERT ON users BEGIN "
+    "INSERT INTO users_fts(rowid, name, email) VALUES (new.rowid, new.name, new.email); END",
+    "CREATE TRIGGER users_fts_ad AFTER DELETE ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, name, email) VALUES ('delete', old.rowid, old.name, old.email); END",
+    "CREATE TRIGGER users_fts_au AFTER UPDATE OF name, email ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, name, email) VALUES ('delete', old.rowid, old.name, old.email); "
+    "INSERT INTO users_fts(rowid, name, email) VALUES (new.rowid, new.name, new.email); END",
+)
+
+for statement in USERS_FTS_DDL:
+    event.listen(User.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(User.__table__, "before_drop", DDL("DROP TABLE IF EXISTS users_fts").execute_if(dialect="sqlite"))
\ No newline at end of file
@@ -0,0 +1,45 @@
+from typing import FrozenSet, Optional
+from sqlalchemy import select
+from app.db.models import User, UserPreference
+
+USER_FIELDS = ("id", "name", "email", "push_token", "preferences")
+_USER_COLUMNS = ("name", "email", "push_token")
+
+def parse_fields(fields: Optional[str]) -> Optional[FrozenSet[str]]:
+    if fields is None:
+        return None
+    requested = frozenset(f.strip() for f in fields.split(",") if f.strip())
+    unknown = requested - set(USER_FIELDS)
+    if not requested or unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown)) or fields}")
+    # Asking for everything is the same as not projecting at all.
+    if requested == set(USER_FIELDS):
+        return None
+    return requested
+
+def projected_select(fields: FrozenSet[str]):
+    stmt = select(User.id, *(getattr(User, name) for name in _USER_COLUMNS if name in fields))
+    if "preferences" in fields:
+        stmt = stmt.add_columns(
+            UserPreference.email.label("preference_email"),
+            UserPreference.push.label("preference_push")
+        ).outerjoin(UserPreference, UserPreference.user_id == User.id)
+    return stmt
+
+def project_row(row, fields: FrozenSet[str]) -> dict:
+    data = {}
+    if "id" in fields:
+        data["id"] = str(row.id)
+    for name in _USER_COLUMNS:
+        if name in fields:
+            data[name] = getattr(row, name)
+    if "preferences" in fields:
+        data["preferences"] = {
+            "email": row.preference_email,
+            "push": row.preference_push,
+            "user_id": str(row.id)
+        }
+    return data
+
+def project_dict(user: dict, fields: FrozenSet[str]) -> dict:
+    return {name: user[name] for name in USER_FIELDS if name in fields}
@@ -0,0 +1,112 @@
+import base64
+import json
+import uuid
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, case, column, func, literal, literal_column, or_, select, table, union
+from sqlalchemy.orm import Session, joinedload
+from app.core.settings import settings
+from app.db.models import User
+
+MIN_QUERY_LENGTH = 3
+
+def encode_cursor(rank: float, user_id: uuid.UUID) -> str:
+    payload = json.dumps([rank, str(user_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[float, uuid.UUID]:
+    try:
+        rank, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(rank, (int, float)) or not isinstance(user_id, str):
+            raise ValueError("Invalid cursor")
+        return float(rank), uuid.UUID(user_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _column_matches(query: str, field, limit: int):
+    substring = "%" + _escape_like(query) + "%"
+    return select(User.id).where(field.ilike(substring, escape="\\")).limit(limit)
+
+def _candidates_truncated(db: Session, query: str) -> bool:
+    # True when some column had more matches than SEARCH_MAX_CANDIDATES, i.e.
+    # the last page is the end of the candidate set, not of the matches.
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    cap = settings.SEARCH_MAX_CANDIDATES
+    return any(
+        db.execute(
+            select(func.count()).select_from(_column_matches(query, field, cap + 1).subquery())
+        ).scalar() > cap
+        for field in (User.name, User.email)
+    )
+
+def _ranked_matches(db: Session, query: str):
+    prefix = _escape_like(query) + "%"
+    prefix_boost = case(
+        (or_(User.email.ilike(prefix, escape="\\"), User.name.ilike(prefix, escape="\\")), 1.0),
+        else_=0.0
+    )
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Each column contributes at most SEARCH_MAX_CANDIDATES matches, read in
+        # word-similarity order by a KNN scan of its gist_trgm_ops index. Queries
+        # matching most of the table ("com", "exa") then rank a bounded set.
+        candidates = union(*(
+            _column_matches(query, field, settings.SEARCH_MAX_CANDIDATES)
+            .order_by(literal(query).op("<<->")(field))
+            for field in (User.name, User.email)
+        ))
+        rank = prefix_boost + func.greatest(
+            func.word_similarity(query, User.name),
+            func.word_similarity(query, User.email)
+        )
+        return (
+            select(User.id, rank.label("search_rank"))
+            .where(User.id.in_(candidates))
+        )
+
+    users_fts = table("users_fts", column("rowid"))
+    fts_table = literal_column("users_fts")
+    phrase = '"' + query.replace('"', '""') + '"'
+    rank = prefix_boost - func.bm25(fts_table)
+    return (
+        select(User.id, rank.label("search_rank"))
+        .join(users_fts, users_fts.c.rowid == literal_column("users.rowid"))
+        .where(fts_table.op("MATCH")(phrase))
+    )
+
+def search_users(
+    db: Session,
+    query: str,
+    limit: int,
+    after: Optional[Tuple[float, uuid.UUID]] = None
+) -> Tuple[List[User], Optional[str], bool]:
+    ranked = _ranked_matches(db, query).subquery("ranked")
+
+    stmt = (
+        select(User, ranked.c.search_rank)
+        .join(ranked, ranked.c.id == User.id)
+        .options(joinedload(User.preferences))
+        .order_by(ranked.c.search_rank.desc(), User.id)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        after_rank, after_id = after
+        stmt = stmt.where(or_(
+            ranked.c.search_rank < after_rank,
+            and_(ranked.c.search_rank == after_rank, User.id > after_id)
+        ))
+
+    rows = db.execute(stmt).all()
+    next_cursor = None
+    truncated = False
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_user, last_rank = rows[-1]
+        next_cursor = encode_cursor(last_rank, last_user.id)
+    else:
+        truncated = _candidates_truncated(db, query)
+
+    return [user for user, _ in rows], next_cursor, truncated
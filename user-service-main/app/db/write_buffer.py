@@ -0,0 +1,187 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+from sqlalchemy import String, bindparam, column, update, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+from app.core.settings import settings
+from app.db.cache import get_redis
+from app.db.database import SessionLocal
+from app.db.models import User
+from app.services.metrics import (
+    cache_operations_total,
+    push_token_flush_batch_size,
+    push_token_writes_total
+)
+
+logger = logging.getLogger(__name__)
+
+# Updates for the same user collapse to the latest token. The future returned by
+# submit() resolves once the batch holding the update is committed; with
+# wait_for_flush off, callers acknowledge early and a crash loses the batch.
+class PushTokenWriteBuffer:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        cache_factory: Callable,
+        flush_interval_ms: int = 20,
+        max_rows: int = 500,
+        wait_for_flush: bool = True
+    ):
+        self._session_factory = session_factory
+        self._cache_factory = cache_factory
+        self._flush_interval = flush_interval_ms / 1000
+        self._max_rows = max_rows
+        self.wait_for_flush = wait_for_flush
+
+        self._cond = threading.Condition()
+        self._pending: Dict[uuid.UUID, str] = {}
+        self._in_flight: Dict[uuid.UUID, str] = {}
+        self._batch_future: Future = Future()
+        self._batch_started = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, user_id: uuid.UUID, push_token: str) -> Future:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Push token write buffer is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="push-token-writer", daemon=True
+                )
+                self._thread.start()
+            if not self._pending:
+                self._batch_started = time.monotonic()
+            self._pending[user_id] = push_token
+            if len(self._pending) == 1 or len(self._pending) >= self._max_rows:
+                self._cond.notify()
+            return self._batch_future
+
+    def pending_token(self, user_id: uuid.UUID) -> Optional[str]:
+        with self._cond:
+            if user_id in self._pending:
+                return self._pending[user_id]
+            return self._in_flight.get(user_id)
+
+    def flush(self) -> None:
+        with self._cond:
+            batch, future = self._take_batch()
+        self._write(batch, future)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def _take_batch(self):
+        batch, future = self._pending, self._batch_future
+        self._pending, self._batch_future = {}, Future()
+        self._in_flight = batch
+        return batch, future
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                while len(self._pending) < self._max_rows and not self._closed:
+                    remaining = self._batch_started + self._flush_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, future = self._take_batch()
+            try:
+                self._write(batch, future)
+            except Exception:
+                # Keep the writer alive; the batch's future already carries the error.
+                logger.exception("Push token flush failed")
+
+    def _write(self, batch: Dict[uuid.UUID, str], future: Future) -> None:
+        try:
+            self._write_batch(batch, future)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            raise
+        finally:
+            with self._cond:
+                if self._in_flight is batch:
+                    self._in_flight = {}
+
+    def _write_batch(self, batch: Dict[uuid.UUID, str], future: Future) -> None:
+        if not batch:
+            future.set_result(0)
+            return
+
+        try:
+            db = self._session_factory()
+            try:
+                db.execute(*_batch_update(db, batch))
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+        except Exception as e:
+            push_token_writes_total.labels(result='failed').inc(len(batch))
+            future.set_exception(e)
+            return
+
+        push_token_flush_batch_size.observe(len(batch))
+        push_token_writes_total.labels(result='written').inc(len(batch))
+
+        try:
+            self._cache_factory().delete(*(f"user:{user_id}" for user_id in batch))
+            cache_operations_total.labels(operation='delete', status='success').inc()
+        except Exception:
+            cache_operations_total.labels(operation='delete', status='error').inc()
+
+        future.set_result(len(batch))
+
+def _batch_update(db: Session, batch: Dict[uuid.UUID, str]):
+    users = User.__table__
+    if db.get_bind().dialect.name == "postgresql":
+        rows = values(
+            column("id", UUID(as_uuid=True)),
+            column("push_token", String),
+            name="v"
+        ).data(list(batch.items()))
+        stmt = (
+            update(users)
+            .where(users.c.id == rows.c.id)
+            .values(push_token=rows.c.push_token)
+        )
+        return (stmt,)
+
+    # Dialects without UPDATE ... FROM (VALUES ...) get a single executemany.
+    stmt = (
+        update(users)
+        .where(users.c.id == bindparam("b_id"))
+        .values(push_token=bindparam("b_push_token"))
+    )
+    return stmt, [
+        {"b_id": user_id, "b_push_token": push_token}
+        for user_id, push_token in batch.items()
+    ]
+
+push_token_buffer = PushTokenWriteBuffer(
+    SessionLocal,
+    get_redis,
+    flush_interval_ms=settings.PUSH_TOKEN_FLUSH_INTERVAL_MS,
+    max_rows=settings.PUSH_TOKEN_FLUSH_MAX_ROWS,
+    wait_for_flush=settings.PUSH_TOKEN_WAIT_FOR_FLUSH
+) if settings.PUSH_TOKEN_WRITE_BEHIND else None
+
+def get_push_token_buffer() -> Optional[PushTokenWriteBuffer]:
+    return push_token_buffer
@@ -0,0 +1,127 @@
+import hmac
+import uuid
+from typing import List, Optional
+import msgpack
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from app.core.settings import settings
+from app.db.cache import get_redis
+from app.db.database import SessionLocal
+from app.services.lookup import lookup_users
+
+MSGPACK = "application/msgpack"
+
+def _parse_id(raw) -> Optional[uuid.UUID]:
+    try:
+        if isinstance(raw, bytes) and len(raw) == 16:
+            return uuid.UUID(bytes=raw)
+        if isinstance(raw, str):
+            return uuid.UUID(raw)
+    except ValueError:
+        pass
+    return None
+
+def _packed(payload, status_code: int = 200) -> Response:
+    return Response(msgpack.packb(payload), status_code=status_code, media_type=MSGPACK)
+
+def _authorized(request: Request) -> bool:
+    expected = settings.INTERNAL_API_TOKEN
+    supplied = request.headers.get("x-internal-token", "")
+    return bool(expected) and hmac.compare_digest(supplied, expected)
+
+class BatchLookupEndpoint:
+    def __init__(self, lookup):
+        self.lookup = lookup
+
+    async def __call__(self, scope, receive, send) -> None:
+        # The body is a stream of msgpack-encoded ids (UUID strings or 16 raw
+        # bytes); one record is streamed back per id, in request order. This is
+        # a raw ASGI endpoint so reading ids and writing results can interleave.
+        if not _authorized(Request(scope)):
+            await _packed({"error": "unauthorized"}, 401)(scope, receive, send)
+            return
+
+        unpacker = msgpack.Unpacker(raw=False)
+        packer = msgpack.Packer()
+
+        async def flush(batch, more_body: bool = True) -> None:
+            found = await run_in_threadpool(self.lookup, [user_id for _, user_id in batch if user_id is not None])
+            chunk = bytearray()
+            for raw, user_id in batch:
+                if user_id is None:
+                    chunk += packer.pack({"id": raw, "error": "invalid_id"})
+                elif user_id in found:
+                    chunk += packer.pack(found[user_id])
+                else:
+                    chunk += packer.pack({"id": str(user_id), "error": "not_found"})
+            await send({"type": "http.response.body", "body": bytes(chunk), "more_body": more_body})
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", MSGPACK.encode("ascii"))],
+        })
+
+        batch_size = settings.INTERNAL_LOOKUP_BATCH_SIZE
+        pending = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            malformed = False
+            try:
+                unpacker.feed(message.get("body", b""))
+                for raw in unpacker:
+                    pending.append((raw, _parse_id(raw)))
+            except (msgpack.UnpackException, ValueError):
+                malformed = True
+            while len(pending) >= batch_size:
+                await flush(pending[:batch_size])
+                pending = pending[batch_size:]
+            if malformed:
+                # Answer the ids decoded so far, then end the stream: nothing
+                # after a corrupt byte can be trusted to line up.
+                if pending:
+                    await flush(pending)
+                await send({
+                    "type": "http.response.body",
+                    "body": packer.pack({"error": "malformed_request"}),
+                    "more_body": False,
+                })
+                return
+            if not message.get("more_body", False):
+                break
+
+        await flush(pending, more_body=False)
+
+def create_internal_app(session_factory=SessionLocal, cache_factory=get_redis) -> Starlette:
+    # Service-to-service lookups: no OAuth2, no GenericResponse envelope, msgpack
+    # bodies. Reads go through the same Redis entries and DB models as /api/v1.
+    def lookup(user_ids: List[uuid.UUID]) -> dict:
+        db = session_factory()
+        try:
+            return lookup_users(db, cache_factory(), user_ids)
+        finally:
+            db.close()
+
+    async def get_user(request: Request) -> Response:
+        if not _authorized(request):
+            return _packed({"error": "unauthorized"}, 401)
+        user_id = _parse_id(request.path_params["user_id"])
+        if user_id is None:
+            return _packed({"error": "invalid_id"}, 400)
+
+        found = await run_in_threadpool(lookup, [user_id])
+        if user_id not in found:
+            return _packed({"id": str(user_id), "error": "not_found"}, 404)
+        return _packed(found[user_id])
+
+    return Starlette(routes=[
+        Route("/internal/v1/users/lookup", BatchLookupEndpoint(lookup), methods=["POST"]),
+        Route("/internal/v1/users/{user_id}", get_user, methods=["GET"]),
+    ])
+
+app = create_internal_app()
@@ -1,16 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from sqlalchemy import text
+from sqlalchemy import func, text
 from prometheus_fastapi_instrumentator import Instrumentator
 from app.api.v1.routes import users, auth
-from app.db.database import get_db
+from app.core.admission import AdmissionControlMiddleware
+from app.core.idempotency import IdempotencyMiddleware
+from app.db.database import SessionLocal, get_db
+from app.db.models import User
 from app.db.cache import get_redis
+from app.db.write_buffer import push_token_buffer
+from app.services.metrics import track_user_count
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    if push_token_buffer is not None:
+        push_token_buffer.close()
 
 app = FastAPI(
     title="User Service",
     version="0.1.0",
-    description="User authentication and management service for the distributed notification system"
+    description="User authentication and management service for the distributed notification system",
+    lifespan=lifespan
 )
 
+def count_users() -> int:
+    db = SessionLocal()
+    try:
+        return db.query(func.count(User.id)).scalar()
+    finally:
+        db.close()
+
+track_user_count(count_users)
+
+app.add_middleware(AdmissionControlMiddleware)
+app.add_middleware(IdempotencyMiddleware, cache_factory=get_redis)
 Instrumentator().instrument(app).expose(app)
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
@@ -36,13 +60,19 @@ def deep_health_check():
         health_status["db"] = "unhealthy"
         health_status["status"] = "unhealthy"
     
+    cache = get_redis()
+    breaker = getattr(cache, "breaker", None)
+    if breaker is not None:
+        health_status["cache_circuit"] = breaker.state
+    
+    # The cache is optional: an outage degrades the service but does not fail it.
     try:
-        cache = get_redis()
         cache.ping()
         health_status["cache"] = "healthy"
     except Exception as e:
         health_status["cache"] = "unhealthy"
-        health_status["status"] = "unhealthy"
+        if health_status["status"] == "healthy":
+            health_status["status"] = "degraded"
     
     if health_status["status"] == "unhealthy":
         raise HTTPException(status_code=503, detail=health_status)
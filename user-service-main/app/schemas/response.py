@@ -1,4 +1,4 @@
-from typing import Generic, Optional, TypeVar
+from typing import Generic, Optional, TypeVar, Union
 from pydantic import BaseModel
 
 T = TypeVar("T")
@@ -9,9 +9,14 @@ class PaginationMeta(BaseModel):
     total: int
     total_pages: int
 
+class CursorPaginationMeta(BaseModel):
+    limit: int
+    next_cursor: Optional[str] = None
+    truncated: bool = False
+
 class GenericResponse(BaseModel, Generic[T]):
     success: bool
     data: Optional[T] = None
     error: Optional[str] = None
     message: str
-    meta: Optional[PaginationMeta] = None
\ No newline at end of file
+    meta: Optional[Union[PaginationMeta, CursorPaginationMeta]] = None
\ No newline at end of file
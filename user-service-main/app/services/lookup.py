@@ -0,0 +1,45 @@
+import json
+import uuid
+from typing import Dict, List
+from sqlalchemy.orm import Session, joinedload
+from app.db.models import User
+from app.schemas.user import User as UserSchema
+from app.services.metrics import cache_hit_rate, cache_operations_total
+
+USER_CACHE_TTL = 3600
+
+def lookup_users(db: Session, cache, user_ids: List[uuid.UUID]) -> Dict[uuid.UUID, dict]:
+    # Same cache entries as GET /users/{id}: one MGET, one IN query for misses,
+    # and one pipelined round trip to cache what the query found.
+    if not user_ids:
+        return {}
+
+    found: Dict[uuid.UUID, dict] = {}
+    cached = cache.mget([f"user:{user_id}" for user_id in user_ids])
+    for user_id, value in zip(user_ids, cached):
+        if value is not None:
+            found[user_id] = json.loads(value)
+
+    hits = len(found)
+    misses = [user_id for user_id in user_ids if user_id not in found]
+    cache_hit_rate.labels(result='hit').inc(hits)
+    cache_hit_rate.labels(result='miss').inc(len(misses))
+    if not misses:
+        return found
+
+    users = (
+        db.query(User)
+        .options(joinedload(User.preferences))
+        .filter(User.id.in_(misses))
+        .all()
+    )
+    pipeline = cache.pipeline(transaction=False)
+    for user in users:
+        user_schema = UserSchema.model_validate(user)
+        pipeline.setex(f"user:{user.id}", USER_CACHE_TTL, user_schema.model_dump_json())
+        found[user.id] = user_schema.model_dump(mode="json")
+    if users:
+        pipeline.execute()
+        cache_operations_total.labels(operation='set', status='success').inc(len(users))
+
+    return found
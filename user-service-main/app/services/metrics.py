@@ -24,11 +24,33 @@ cache_operations_total = Counter(
     ['operation', 'status']
 )
 
+cache_circuit_state = Gauge(
+    'cache_circuit_state',
+    'Redis circuit breaker state (0=closed, 1=half-open, 2=open)'
+)
+
 active_users_gauge = Gauge(
     'active_users_total',
     'Total number of registered users'
 )
 
+def track_user_count(count_users, max_age: float = 60.0) -> None:
+    # Evaluated at scrape time and throttled, so the COUNT(*) stays off the
+    # request path and the gauge reports the table, not one worker's signups.
+    state = {"value": float("nan"), "refreshed_at": float("-inf")}
+    
+    def current_count() -> float:
+        now = time.monotonic()
+        if now - state["refreshed_at"] >= max_age:
+            try:
+                state["value"] = float(count_users())
+                state["refreshed_at"] = now
+            except Exception:
+                pass
+        return state["value"]
+    
+    active_users_gauge.set_function(current_count)
+
 db_query_duration_seconds = Histogram(
     'db_query_duration_seconds',
     'Database query duration in seconds',
@@ -39,4 +61,46 @@ cache_hit_rate = Counter(
     'cache_hit_rate_total',
     'Cache hit/miss counter',
     ['result']
+)
+
+push_token_writes_total = Counter(
+    'push_token_writes_total',
+    'Push token updates by outcome',
+    ['result']
+)
+
+push_token_flush_batch_size = Histogram(
+    'push_token_flush_batch_size',
+    'Number of users written per buffered push token flush',
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+
+admission_concurrency_limit = Gauge(
+    'admission_concurrency_limit',
+    'Current adaptive concurrency limit per route class',
+    ['route_class']
+)
+
+admission_in_flight = Gauge(
+    'admission_in_flight',
+    'Requests currently admitted per route class',
+    ['route_class']
+)
+
+admission_rejections_total = Counter(
+    'admission_rejections_total',
+    'Requests shed by admission control',
+    ['route_class']
+)
+
+admission_queue_seconds = Histogram(
+    'admission_queue_seconds',
+    'Time requests spent queued for admission',
+    ['route_class']
+)
+
+idempotency_requests_total = Counter(
+    'idempotency_requests_total',
+    'Requests carrying an Idempotency-Key by outcome',
+    ['result']
 )
\ No newline at end of file
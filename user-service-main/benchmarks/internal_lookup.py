@@ -0,0 +1,100 @@
+"""Compare the public JSON user lookup with the internal msgpack API.
+
+Runs both in-process against SQLite and fakeredis, so the numbers measure
+per-request framework and serialization overhead, not network or DB latency:
+
+    python -m benchmarks.internal_lookup --users 200 --rounds 5
+"""
+import argparse
+import os
+import time
+import msgpack
+from fakeredis import FakeStrictRedis
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.settings import settings
+from app.db.cache import get_redis
+from app.db.database import get_db
+from app.db.models import Base
+from app.internal import create_internal_app
+from app.main import app
+
+DB_PATH = "./benchmark.db"
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False})
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    cache = FakeStrictRedis(decode_responses=True)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_redis] = lambda: cache
+    settings.INTERNAL_API_TOKEN = "benchmark"
+    Base.metadata.create_all(bind=engine)
+
+    try:
+        with TestClient(app) as public, TestClient(create_internal_app(session_factory, lambda: cache)) as internal:
+            user_ids = []
+            for i in range(args.users):
+                response = public.post("/api/v1/users/", json={
+                    "name": f"Bench {i}",
+                    "email": f"bench{i}@example.com",
+                    "password": "password123",
+                    "preferences": {"email": True, "push": True}
+                })
+                user_ids.append(response.json()["data"]["id"])
+
+            token = public.post(
+                "/api/v1/auth/login",
+                data={"username": "bench0@example.com", "password": "password123"}
+            ).json()["data"]["access_token"]
+            public.headers["Authorization"] = f"Bearer {token}"
+            internal.headers["X-Internal-Token"] = "benchmark"
+
+            def json_lookup():
+                for user_id in user_ids:
+                    public.get(f"/api/v1/users/{user_id}").json()
+
+            def msgpack_lookup():
+                for user_id in user_ids:
+                    msgpack.unpackb(internal.get(f"/internal/v1/users/{user_id}").content)
+
+            def msgpack_batch():
+                body = b"".join(msgpack.packb(user_id) for user_id in user_ids)
+                unpacker = msgpack.Unpacker(raw=False)
+                unpacker.feed(internal.post("/internal/v1/users/lookup", content=body).content)
+                assert len(list(unpacker)) == len(user_ids)
+
+            # Warm the cache so every variant measures the hit path.
+            json_lookup()
+
+            for name, run in [
+                ("json GET /api/v1/users/{id}", json_lookup),
+                ("msgpack GET /internal/v1/users/{id}", msgpack_lookup),
+                ("msgpack POST /internal/v1/users/lookup", msgpack_batch),
+            ]:
+                started = time.perf_counter()
+                for _ in range(args.rounds):
+                    run()
+                elapsed = time.perf_counter() - started
+                per_lookup = elapsed / (args.rounds * len(user_ids)) * 1e6
+                print(f"{name:42s} {per_lookup:8.1f} us/lookup")
+    finally:
+        app.dependency_overrides.clear()
+        Base.metadata.drop_all(bind=engine)
+        os.remove(DB_PATH)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from app.main import app
+from app.core.idempotency import IdempotencyMiddleware
 from app.db.database import get_db
 from app.db.models import Base
 from app.db.cache import get_redis
+from app.db.write_buffer import PushTokenWriteBuffer, get_push_token_buffer
 from fakeredis import FakeStrictRedis
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -27,6 +29,9 @@ def override_get_redis():
 
 app.dependency_overrides[get_db] = override_get_db
 app.dependency_overrides[get_redis] = override_get_redis
+for middleware in app.user_middleware:
+    if middleware.cls is IdempotencyMiddleware:
+        middleware.kwargs["cache_factory"] = override_get_redis
 
 @pytest.fixture(scope="function")
 def client():
@@ -34,4 +39,23 @@ def client():
     with TestClient(app) as c:
         yield c
     Base.metadata.drop_all(bind=engine)
-    fake_redis.flushall()
\ No newline at end of file
+    fake_redis.flushall()
+
+@pytest.fixture(scope="function")
+def push_token_buffer(client):
+    buffer = PushTokenWriteBuffer(TestingSessionLocal, override_get_redis, flush_interval_ms=5)
+    app.dependency_overrides[get_push_token_buffer] = lambda: buffer
+    yield buffer
+    del app.dependency_overrides[get_push_token_buffer]
+    buffer.close()
+
+@pytest.fixture(scope="function")
+def query_counter():
+    statements = []
+    
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine, "before_cursor_execute", count)
\ No newline at end of file
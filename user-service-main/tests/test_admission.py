@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from app.core.admission import AdaptiveLimiter, classify, limiters
+
+def test_classify_routes():
+    assert classify("GET", "/health") is None
+    assert classify("GET", "/health/deep") is None
+    assert classify("GET", "/metrics") is None
+    assert classify("POST", "/api/v1/auth/login") == "auth"
+    assert classify("POST", "/api/v1/users/") == "auth"
+    assert classify("GET", "/api/v1/users/search") == "read"
+    assert classify("PUT", "/api/v1/users/123/push-token") == "write"
+
+def test_limiter_sheds_after_queue_timeout():
+    async def scenario():
+        limiter = AdaptiveLimiter("test", limit=1, min_limit=1, max_limit=4, max_queue_time=0.01, target_latency=1, backoff_window=1)
+        assert await limiter.acquire() is True
+        assert await limiter.acquire() is False
+        limiter.release(0.001)
+        assert await limiter.acquire() is True
+    
+    asyncio.run(scenario())
+
+def test_limiter_hands_slot_to_waiter():
+    async def scenario():
+        limiter = AdaptiveLimiter("test", limit=1, min_limit=1, max_limit=1, max_queue_time=1, target_latency=1, backoff_window=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release(0.001)
+        assert await waiter is True
+        assert limiter.in_flight == 1
+    
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        limiter = AdaptiveLimiter("test", limit=1, min_limit=1, max_limit=1, max_queue_time=1, target_latency=1, backoff_window=1)
+        await limiter.acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        limiter.release(0.001)
+        
+        assert limiter.in_flight == 0
+        assert await limiter.acquire() is True
+    
+    asyncio.run(scenario())
+
+def test_cancel_after_grant_returns_the_slot():
+    async def scenario():
+        limiter = AdaptiveLimiter("test", limit=1, min_limit=1, max_limit=1, max_queue_time=1, target_latency=1, backoff_window=1)
+        await limiter.acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release(0.001)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        
+        assert limiter.in_flight == 0
+        assert await limiter.acquire() is True
+    
+    asyncio.run(scenario())
+
+def test_limiter_backs_off_on_slow_requests():
+    limiter = AdaptiveLimiter("test", limit=10, min_limit=2, max_limit=20, max_queue_time=0, target_latency=0.1, backoff_window=60)
+    limiter.in_flight = 5
+    for _ in range(5):
+        limiter.release(5)
+    
+    assert limiter.limit == pytest.approx(9)
+
+def test_sequential_bcrypt_requests_keep_auth_limit(client, monkeypatch):
+    monkeypatch.setattr(limiters["auth"], "limit", float(limiters["auth"].limit))
+    starting_limit = limiters["auth"].limit
+    user_data = {
+        "name": "Test User",
+        "email": "test@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": True}
+    }
+    
+    assert client.post("/api/v1/users/", json=user_data).status_code == 201
+    for _ in range(3):
+        response = client.post(
+            "/api/v1/auth/login",
+            data={"username": "test@example.com", "password": "password123"}
+        )
+        assert response.status_code == 200
+    
+    assert limiters["auth"].limit >= starting_limit
+
+def test_overloaded_route_is_shed_but_health_is_not(client, monkeypatch):
+    monkeypatch.setattr(limiters["read"], "in_flight", int(limiters["read"].limit))
+    monkeypatch.setattr(limiters["read"], "max_queue_time", 0.01)
+    
+    response = client.get("/api/v1/users/00000000-0000-0000-0000-000000000000")
+    
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert client.get("/health").status_code == 200
@@ -0,0 +1,79 @@
+from fakeredis import FakeServer, FakeStrictRedis
+from prometheus_client import REGISTRY
+from app.db.cache import CircuitBreaker, CircuitBreakerCache
+
+def make_cache(failure_threshold=2, reset_timeout=60):
+    server = FakeServer()
+    client = FakeStrictRedis(server=server, decode_responses=True)
+    return server, CircuitBreakerCache(client, CircuitBreaker(failure_threshold, reset_timeout))
+
+def test_cache_fails_open_when_redis_is_down():
+    server, cache = make_cache()
+    cache.setex("user:1", 60, "cached")
+    server.connected = False
+    
+    assert cache.get("user:1") is None
+    assert cache.get("user:1") is None
+    assert cache.breaker.state == CircuitBreaker.OPEN
+    assert cache.setex("user:1", 60, "other") is None
+
+def test_open_breaker_skips_redis_calls():
+    server, cache = make_cache(failure_threshold=1)
+    server.connected = False
+    cache.get("user:1")
+    server.connected = True
+    
+    cache.client.set("user:1", "cached")
+    
+    assert cache.breaker.state == CircuitBreaker.OPEN
+    assert cache.get("user:1") is None
+
+def test_breaker_recovers_and_replays_skipped_deletes():
+    server, cache = make_cache(failure_threshold=1, reset_timeout=0)
+    cache.setex("user:1", 60, "stale")
+    server.connected = False
+    
+    cache.delete("user:1")
+    server.connected = True
+    
+    assert cache.get("user:2") is None
+    assert cache.breaker.state == CircuitBreaker.CLOSED
+    assert cache.client.get("user:1") is None
+
+def test_failed_delete_is_replayed_while_breaker_is_closed():
+    server, cache = make_cache(failure_threshold=5)
+    cache.setex("user:1", 60, "stale")
+    server.connected = False
+    
+    cache.delete("user:1")
+    server.connected = True
+    
+    assert cache.breaker.state == CircuitBreaker.CLOSED
+    assert cache.get("user:1") is None
+    assert cache.client.get("user:1") is None
+
+def test_pending_delete_overflow_is_counted():
+    server = FakeServer()
+    client = FakeStrictRedis(server=server, decode_responses=True)
+    cache = CircuitBreakerCache(client, CircuitBreaker(5, 60), max_pending_deletes=1)
+    labels = {"operation": "delete", "status": "dropped"}
+    before = REGISTRY.get_sample_value("cache_operations_total", labels) or 0
+    server.connected = False
+    
+    cache.delete("user:1")
+    cache.delete("user:2")
+    
+    assert REGISTRY.get_sample_value("cache_operations_total", labels) == before + 1
+
+def test_pipeline_goes_through_breaker():
+    server, cache = make_cache(failure_threshold=1)
+    pipeline = cache.pipeline(transaction=False)
+    pipeline.setex("user:1", 60, "cached").setex("user:2", 60, "cached")
+    
+    assert pipeline.execute() == [True, True]
+    assert cache.client.get("user:2") == "cached"
+    
+    server.connected = False
+    pipeline.setex("user:3", 60, "cached")
+    assert pipeline.execute() == [None]
+    assert cache.breaker.state == CircuitBreaker.OPEN
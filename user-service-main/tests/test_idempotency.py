@@ -0,0 +1,73 @@
+import json
+from unittest.mock import patch
+from tests.conftest import fake_redis
+
+def test_create_user_replays_with_idempotency_key(client):
+    user_data = {
+        "name": "Retry User",
+        "email": "retry@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": True}
+    }
+    headers = {"Idempotency-Key": "signup-1"}
+    
+    first = client.post("/api/v1/users/", json=user_data, headers=headers)
+    with patch("app.api.v1.routes.users.get_password_hash") as hash_password:
+        second = client.post("/api/v1/users/", json=user_data, headers=headers)
+    
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    hash_password.assert_not_called()
+
+def test_idempotency_key_reuse_with_different_body(client):
+    headers = {"Idempotency-Key": "signup-2"}
+    client.post("/api/v1/users/", json={
+        "name": "First",
+        "email": "first@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": True}
+    }, headers=headers)
+    
+    response = client.post("/api/v1/users/", json={
+        "name": "Second",
+        "email": "second@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": True}
+    }, headers=headers)
+    
+    assert response.status_code == 422
+
+def test_in_progress_request_returns_conflict(client):
+    user_data = {
+        "name": "Busy User",
+        "email": "busy@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": True}
+    }
+    
+    first = client.post("/api/v1/users/", json=user_data, headers={"Idempotency-Key": "signup-3"})
+    record_key = next(iter(fake_redis.scan_iter("idempotency:*")))
+    record = json.loads(fake_redis.get(record_key))
+    fake_redis.set(record_key, json.dumps({"status": "in_progress", "fingerprint": record["fingerprint"]}))
+    
+    response = client.post("/api/v1/users/", json=user_data, headers={"Idempotency-Key": "signup-3"})
+    
+    assert first.status_code == 201
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+
+def test_marker_is_released_when_record_cannot_be_stored(client):
+    user_data = {
+        "name": "Unstored User",
+        "email": "unstored@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": True}
+    }
+    
+    with patch.object(fake_redis, "setex", return_value=None):
+        response = client.post("/api/v1/users/", json=user_data, headers={"Idempotency-Key": "signup-4"})
+    
+    assert response.status_code == 201
+    assert list(fake_redis.scan_iter("idempotency:*")) == []
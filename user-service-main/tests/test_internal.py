@@ -0,0 +1,94 @@
+import uuid
+from unittest.mock import patch
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+from app.core.settings import settings
+from app.internal import create_internal_app
+from tests.conftest import TestingSessionLocal, fake_redis, override_get_redis
+
+@pytest.fixture(scope="function")
+def internal_client(client, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "internal-secret")
+    monkeypatch.setattr(settings, "INTERNAL_LOOKUP_BATCH_SIZE", 2)
+    with TestClient(create_internal_app(TestingSessionLocal, override_get_redis)) as c:
+        c.headers["X-Internal-Token"] = "internal-secret"
+        yield c
+
+def create_user(client, email):
+    response = client.post("/api/v1/users/", json={
+        "name": "Internal User",
+        "email": email,
+        "password": "password123",
+        "preferences": {"email": True, "push": False}
+    })
+    return response.json()["data"]["id"]
+
+def test_internal_lookup_by_id(client, internal_client):
+    user_id = create_user(client, "internal@example.com")
+    
+    response = internal_client.get(f"/internal/v1/users/{user_id}")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    user = msgpack.unpackb(response.content)
+    assert user["email"] == "internal@example.com"
+    assert user["preferences"]["push"] is False
+
+def test_internal_lookup_requires_token(client, internal_client):
+    response = internal_client.get(f"/internal/v1/users/{uuid.uuid4()}", headers={"X-Internal-Token": "wrong"})
+    
+    assert response.status_code == 401
+
+def test_internal_batch_lookup_streams_in_order(client, internal_client):
+    first = create_user(client, "batch1@example.com")
+    second = create_user(client, "batch2@example.com")
+    missing = str(uuid.uuid4())
+    
+    body = b"".join(msgpack.packb(i) for i in [second, missing, uuid.UUID(first).bytes, "nope"])
+    response = internal_client.post("/internal/v1/users/lookup", content=body)
+    
+    unpacker = msgpack.Unpacker(raw=False)
+    unpacker.feed(response.content)
+    results = list(unpacker)
+    
+    assert response.status_code == 200
+    assert results[0]["email"] == "batch2@example.com"
+    assert results[2]["email"] == "batch1@example.com"
+    assert results[1] == {"id": missing, "error": "not_found"}
+    assert results[3] == {"id": "nope", "error": "invalid_id"}
+
+def test_internal_batch_lookup_rejects_malformed_body(client, internal_client):
+    response = internal_client.post("/internal/v1/users/lookup", content=b"\xc1")
+    
+    unpacker = msgpack.Unpacker(raw=False)
+    unpacker.feed(response.content)
+    
+    assert response.status_code == 200
+    assert list(unpacker) == [{"error": "malformed_request"}]
+
+def test_internal_batch_lookup_answers_ids_before_malformed_byte(client, internal_client):
+    user_id = create_user(client, "before@example.com")
+    
+    response = internal_client.post("/internal/v1/users/lookup", content=msgpack.packb(user_id) + b"\xc1")
+    
+    unpacker = msgpack.Unpacker(raw=False)
+    unpacker.feed(response.content)
+    results = list(unpacker)
+    
+    assert results[0]["email"] == "before@example.com"
+    assert results[1] == {"error": "malformed_request"}
+
+def test_internal_batch_lookup_caches_misses_in_one_pipeline(client, internal_client):
+    user_ids = [create_user(client, f"pipeline{i}@example.com") for i in range(2)]
+    
+    body = b"".join(msgpack.packb(i) for i in user_ids)
+    with (
+        patch.object(fake_redis, "setex") as setex,
+        patch.object(fake_redis, "pipeline", wraps=fake_redis.pipeline) as pipeline
+    ):
+        internal_client.post("/internal/v1/users/lookup", content=body)
+    
+    setex.assert_not_called()
+    pipeline.assert_called_once_with(transaction=False)
+    assert all(fake_redis.get(f"user:{user_id}") is not None for user_id in user_ids)
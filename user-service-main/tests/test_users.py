@@ -1,4 +1,17 @@
+import uuid
+from datetime import datetime
+import pytest
 from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import joinedload
+from app import main
+from app.api.v1.routes.auth import get_current_user
+from app.api.v1.routes.users import _registration_statement
+from app.services.metrics import track_user_count
+from app.db.models import User
+from app.db.write_buffer import PushTokenWriteBuffer, get_push_token_buffer
+from tests.conftest import TestingSessionLocal, fake_redis
 
 def test_create_user(client):
     user_data = {
@@ -34,6 +47,61 @@ def test_create_duplicate_user(client):
     assert response.status_code == 400
     assert response.json()["detail"] == "Email already registered"
 
+def test_create_user_does_not_select(client, query_counter):
+    user_data = {
+        "name": "Single Trip",
+        "email": "singletrip@example.com",
+        "password": "password123",
+        "preferences": {"email": False, "push": True}
+    }
+    
+    response = client.post("/api/v1/users/", json=user_data)
+    
+    assert response.status_code == 201
+    assert response.json()["data"]["preferences"]["email"] is False
+    assert not [s for s in query_counter if s.lstrip().upper().startswith("SELECT")]
+
+def test_registration_statement_compiles_for_postgres():
+    user_id = uuid.uuid4()
+    stmt = _registration_statement(
+        {"id": user_id, "name": "Pg User", "email": "pg@example.com", "hashed_password": "x", "created_at": datetime.utcnow()},
+        {"id": uuid.uuid4(), "user_id": user_id, "email": True, "push": False}
+    )
+    
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    
+    assert "WITH new_user AS" in sql
+    assert "ON CONFLICT (email) DO NOTHING" in sql
+    assert "new_preference AS" in sql
+    assert "INSERT INTO user_preferences" in sql
+    assert "FROM new_user" in sql
+
+def test_active_users_gauge_counts_table(client):
+    calls = []
+    
+    def count_users():
+        calls.append(1)
+        db = TestingSessionLocal()
+        try:
+            return db.query(User).count()
+        finally:
+            db.close()
+    
+    track_user_count(count_users, max_age=3600)
+    try:
+        client.post("/api/v1/users/", json={
+            "name": "Counted",
+            "email": "counted@example.com",
+            "password": "password123",
+            "preferences": {"email": True, "push": True}
+        })
+        
+        assert REGISTRY.get_sample_value("active_users_total") == 1
+        assert REGISTRY.get_sample_value("active_users_total") == 1
+        assert len(calls) == 1
+    finally:
+        track_user_count(main.count_users)
+
 def test_get_user(client):
     user_data = {
         "name": "Get User",
@@ -96,6 +164,193 @@ def test_update_push_token(client):
     assert response.status_code == 200
     assert response.json()["data"]["push_token"] == "new_push_token_123"
 
+def test_update_push_token_query_count(client, query_counter):
+    user_data = {
+        "name": "Counted Push User",
+        "email": "countedpush@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": True}
+    }
+    
+    create_response = client.post("/api/v1/users/", json=user_data)
+    user_id = create_response.json()["data"]["id"]
+    
+    login_response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "countedpush@example.com", "password": "password123"}
+    )
+    token = login_response.json()["data"]["access_token"]
+    
+    query_counter.clear()
+    response = client.put(
+        f"/api/v1/users/{user_id}/push-token",
+        json={"push_token": "counted_token"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    
+    assert response.status_code == 200
+    assert response.json()["data"]["push_token"] == "counted_token"
+    assert response.json()["data"]["preferences"]["push"] is True
+    assert len(query_counter) == 2
+
+def test_update_push_token_unchanged(client):
+    user_data = {
+        "name": "Same Token User",
+        "email": "sametoken@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": True}
+    }
+    
+    create_response = client.post("/api/v1/users/", json=user_data)
+    user_id = create_response.json()["data"]["id"]
+    
+    login_response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "sametoken@example.com", "password": "password123"}
+    )
+    token = login_response.json()["data"]["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    client.put(f"/api/v1/users/{user_id}/push-token", json={"push_token": "token_abc"}, headers=headers)
+    response = client.put(f"/api/v1/users/{user_id}/push-token", json={"push_token": "token_abc"}, headers=headers)
+    
+    assert response.status_code == 200
+    assert response.json()["message"] == "Push token unchanged"
+    assert response.json()["data"]["push_token"] == "token_abc"
+
+def test_update_push_token_write_behind(client, push_token_buffer):
+    user_data = {
+        "name": "Buffered User",
+        "email": "buffered@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": True}
+    }
+    
+    create_response = client.post("/api/v1/users/", json=user_data)
+    user_id = create_response.json()["data"]["id"]
+    
+    login_response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "buffered@example.com", "password": "password123"}
+    )
+    token = login_response.json()["data"]["access_token"]
+    
+    response = client.put(
+        f"/api/v1/users/{user_id}/push-token",
+        json={"push_token": "buffered_token"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    
+    assert response.status_code == 200
+    assert response.json()["data"]["push_token"] == "buffered_token"
+    
+    response = client.get(f"/api/v1/users/{user_id}", headers={"Authorization": f"Bearer {token}"})
+    assert response.json()["data"]["push_token"] == "buffered_token"
+
+def test_write_behind_does_not_skip_reverting_a_flushed_token(client):
+    user_data = {
+        "name": "Reverted User",
+        "email": "reverted@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": True}
+    }
+    
+    create_response = client.post("/api/v1/users/", json=user_data)
+    user_id = uuid.UUID(create_response.json()["data"]["id"])
+    db = TestingSessionLocal()
+    db.get(User, user_id).push_token = "A"
+    db.commit()
+    stale_user = db.query(User).options(joinedload(User.preferences)).filter(User.id == user_id).one()
+    db.close()
+    
+    buffer = PushTokenWriteBuffer(TestingSessionLocal, lambda: fake_redis, flush_interval_ms=60000, wait_for_flush=False)
+    main.app.dependency_overrides[get_push_token_buffer] = lambda: buffer
+    # The caller was loaded with token A just before a buffered A -> B batch committed.
+    main.app.dependency_overrides[get_current_user] = lambda: stale_user
+    try:
+        buffer.submit(user_id, "B")
+        buffer.flush()
+        
+        response = client.put(f"/api/v1/users/{user_id}/push-token", json={"push_token": "A"})
+        buffer.flush()
+    finally:
+        del main.app.dependency_overrides[get_push_token_buffer]
+        del main.app.dependency_overrides[get_current_user]
+        buffer.close()
+    
+    assert response.json()["message"] == "Push token updated successfully"
+    db = TestingSessionLocal()
+    try:
+        assert db.get(User, user_id).push_token == "A"
+    finally:
+        db.close()
+
+def test_push_token_buffer_coalesces_updates(client, query_counter):
+    user_data = {
+        "name": "Coalesced User",
+        "email": "coalesced@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": True}
+    }
+    
+    create_response = client.post("/api/v1/users/", json=user_data)
+    user_id = uuid.UUID(create_response.json()["data"]["id"])
+    
+    # A long interval keeps the flush thread from writing until flush() is called.
+    buffer = PushTokenWriteBuffer(TestingSessionLocal, lambda: fake_redis, flush_interval_ms=60000)
+    try:
+        first = buffer.submit(user_id, "first")
+        second = buffer.submit(user_id, "second")
+        
+        assert first is second
+        assert buffer.pending_token(user_id) == "second"
+        
+        query_counter.clear()
+        buffer.flush()
+        
+        assert second.result(timeout=5) == 1
+        assert len([s for s in query_counter if s.lstrip().upper().startswith("UPDATE")]) == 1
+    finally:
+        buffer.close()
+    
+    db = TestingSessionLocal()
+    try:
+        assert db.get(User, user_id).push_token == "second"
+    finally:
+        db.close()
+
+def test_push_token_writer_survives_session_failure(client):
+    user_data = {
+        "name": "Outage User",
+        "email": "outage@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": True}
+    }
+    
+    create_response = client.post("/api/v1/users/", json=user_data)
+    user_id = uuid.UUID(create_response.json()["data"]["id"])
+    sessions = []
+    
+    def session_factory():
+        sessions.append(None)
+        if len(sessions) == 1:
+            raise ConnectionError("database unavailable")
+        return TestingSessionLocal()
+    
+    buffer = PushTokenWriteBuffer(session_factory, lambda: fake_redis, flush_interval_ms=5)
+    try:
+        with pytest.raises(ConnectionError):
+            buffer.submit(user_id, "lost").result(timeout=5)
+        assert buffer.submit(user_id, "kept").result(timeout=5) == 1
+    finally:
+        buffer.close()
+    
+    db = TestingSessionLocal()
+    try:
+        assert db.get(User, user_id).push_token == "kept"
+    finally:
+        db.close()
+
 def test_update_preferences(client):
     user_data = {
         "name": "Pref User",
@@ -121,4 +376,146 @@ def test_update_preferences(client):
     
     assert response.status_code == 200
     assert response.json()["data"]["preferences"]["email"] is False
-    assert response.json()["data"]["preferences"]["push"] is False
\ No newline at end of file
+    assert response.json()["data"]["preferences"]["push"] is False
+
+def test_update_preferences_query_count(client, query_counter):
+    user_data = {
+        "name": "Counted Pref User",
+        "email": "countedpref@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": True}
+    }
+    
+    create_response = client.post("/api/v1/users/", json=user_data)
+    user_id = create_response.json()["data"]["id"]
+    
+    login_response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "countedpref@example.com", "password": "password123"}
+    )
+    token = login_response.json()["data"]["access_token"]
+    
+    query_counter.clear()
+    response = client.put(
+        f"/api/v1/users/{user_id}/preferences",
+        json={"preferences": {"email": False, "push": True}},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    
+    assert response.status_code == 200
+    assert response.json()["data"]["email"] == "countedpref@example.com"
+    assert response.json()["data"]["preferences"]["email"] is False
+    assert len(query_counter) == 2
+
+def test_search_users(client):
+    for name, email in [
+        ("Alice Smith", "alice@example.com"),
+        ("Malice Jones", "mjones@example.com"),
+        ("Bob Stone", "bob@example.com"),
+    ]:
+        client.post("/api/v1/users/", json={
+            "name": name,
+            "email": email,
+            "password": "password123",
+            "preferences": {"email": True, "push": True}
+        })
+    
+    login_response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "bob@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {login_response.json()['data']['access_token']}"}
+    
+    response = client.get("/api/v1/users/search", params={"q": "alic", "limit": 1}, headers=headers)
+    
+    assert response.status_code == 200
+    assert [u["email"] for u in response.json()["data"]] == ["alice@example.com"]
+    next_cursor = response.json()["meta"]["next_cursor"]
+    assert next_cursor is not None
+    
+    response = client.get(
+        "/api/v1/users/search",
+        params={"q": "alic", "limit": 1, "cursor": next_cursor},
+        headers=headers
+    )
+    
+    assert [u["email"] for u in response.json()["data"]] == ["mjones@example.com"]
+    assert response.json()["meta"]["next_cursor"] is None
+    assert response.json()["meta"]["truncated"] is False
+
+def test_search_users_invalid_cursor(client):
+    client.post("/api/v1/users/", json={
+        "name": "Cursor User",
+        "email": "cursor@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": True}
+    })
+    login_response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "cursor@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {login_response.json()['data']['access_token']}"}
+    
+    for cursor in ("not-a-cursor", "WzEsIDJd"):
+        response = client.get("/api/v1/users/search", params={"q": "cursor", "cursor": cursor}, headers=headers)
+        
+        assert response.status_code == 400
+
+def test_get_user_with_fields(client, query_counter):
+    user_data = {
+        "name": "Sparse User",
+        "email": "sparse@example.com",
+        "password": "password123",
+        "preferences": {"email": True, "push": False}
+    }
+    
+    create_response = client.post("/api/v1/users/", json=user_data)
+    user_id = create_response.json()["data"]["id"]
+    
+    login_response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "sparse@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {login_response.json()['data']['access_token']}"}
+    
+    response = client.get(f"/api/v1/users/{user_id}", params={"fields": "id,push_token"}, headers=headers)
+    
+    assert response.status_code == 200
+    assert response.json()["message"] == "User retrieved successfully"
+    assert response.json()["data"] == {"id": user_id, "push_token": None}
+    
+    query_counter.clear()
+    response = client.get(f"/api/v1/users/{user_id}", params={"fields": "id,push_token"}, headers=headers)
+    
+    assert response.json()["message"] == "User retrieved from cache"
+    assert response.json()["data"] == {"id": user_id, "push_token": None}
+    assert len(query_counter) == 1
+    
+    response = client.get(f"/api/v1/users/{user_id}", params={"fields": "preferences"}, headers=headers)
+    
+    assert response.json()["message"] == "User retrieved from cache"
+    assert response.json()["data"] == {"preferences": {"email": True, "push": False, "user_id": user_id}}
+
+def test_list_users_with_fields(client):
+    client.post("/api/v1/users/", json={
+        "name": "Listed User",
+        "email": "listed@example.com",
+        "password": "password123",
+        "preferences": {"email": False, "push": True}
+    })
+    login_response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "listed@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {login_response.json()['data']['access_token']}"}
+    
+    response = client.get("/api/v1/users/", params={"fields": "email,preferences"}, headers=headers)
+    
+    assert response.status_code == 200
+    assert response.json()["data"][0]["email"] == "listed@example.com"
+    assert response.json()["data"][0]["preferences"]["email"] is False
+    assert "name" not in response.json()["data"][0]
+    
+    response = client.get("/api/v1/users/", params={"fields": "hashed_password"}, headers=headers)
+    
+    assert response.status_code == 400
\ No newline at end of file